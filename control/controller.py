@@ -6,7 +6,10 @@ No RL; explicit rules: object left → rotate left, centered → forward, lost 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from vision.tracker import TrackerState
 
 
 @dataclass
@@ -39,12 +42,12 @@ class Controller:
         self.rotate_speed = rotate_speed
         self.search_speed = search_speed
 
-    def update(self, tracker_state: dict[str, Any]) -> ControlSignal:
+    def update(self, tracker_state: TrackerState) -> ControlSignal:
         """
         Compute control from tracker_state: found, cx_norm, cy_norm.
         """
-        found = tracker_state.get("found", False)
-        cx_norm = tracker_state.get("cx_norm", 0.5)
+        found = tracker_state.found
+        cx_norm = tracker_state.cx_norm
         center = 0.5
         margin = self.center_margin
 
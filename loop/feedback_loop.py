@@ -5,15 +5,18 @@ Closed-loop perception–action cycle:
 
 from __future__ import annotations
 
+import queue
+import threading
 import time
+from collections import OrderedDict
 from typing import Any, Callable
 
 import cv2
 import numpy as np
 
 from control.controller import ControlSignal, Controller
-from vision.detector import Detector
-from vision.tracker import SimpleTracker
+from vision.detector import Detections, Detector
+from vision.tracker import SimpleTracker, TrackerState
 
 
 class FeedbackLoop:
@@ -32,11 +35,26 @@ class FeedbackLoop:
         tracker: SimpleTracker,
         controller: Controller,
         target_classes: list[int] | None = None,
+        detect_every: int = 3,
     ) -> None:
         self.detector = detector
         self.tracker = tracker
         self.controller = controller
         self.target_classes = target_classes  # restrict detection; None = all
+        self._classes_arr = np.asarray(target_classes, dtype=np.int64) if target_classes else None
+        # Run YOLO on every Nth frame; an OpenCV tracker follows the target in between.
+        self.detect_every = max(1, detect_every)
+        self._frame_idx = 0
+        self._tracker_cv: Any = None
+        self._tracked: Detections | None = None  # target row the OpenCV tracker follows
+        # Static overlay (center band) rendered once per frame size, stamped via mask.
+        self._overlay_template: np.ndarray | None = None
+        self._overlay_mask: np.ndarray | None = None
+        self._overlay_cols = (0, 0)
+        self._overlay_size: tuple[int, int] | None = None
+        # Outlined control text pre-rendered per (mode, linear, angular); small LRU.
+        self._text_cache: OrderedDict[tuple[str, float, float], tuple] = OrderedDict()
+        self._text_cache_size = 64
 
     def step(
         self,
@@ -44,71 +62,411 @@ class FeedbackLoop:
     ) -> tuple[np.ndarray, ControlSignal, dict[str, Any]]:
         """
         One iteration: frame in → annotated frame out, control signal, state.
+        Annotations are drawn on frame itself (no copy); pass frame.copy() to keep it.
+        """
+        control, state = self.step_control(frame)
+        return self.render(frame, state, control), control, state
+
+    def step_control(
+        self,
+        frame: np.ndarray,
+        detections: Detections | None = None,
+    ) -> tuple[ControlSignal, dict[str, Any]]:
+        """
+        Control path only: detect / track → control signal and state, no drawing.
+        Precomputed detections (from detect_batch) skip the detector call.
         """
         h, w = frame.shape[:2]
-        detections = self.detector.detect(frame, classes=self.target_classes)
-        tracker_state = self.tracker.update(detections, w, h)
+        if detections is None and self._detect_due(0):
+            detections = self.detector.detect(frame, classes=self._classes_arr)
+        if detections is not None:
+            tracker_state = self.tracker.update(detections, w, h)
+            self._start_cv_tracker(frame, detections, tracker_state.index)
+        else:
+            detections = self._follow_cv_tracker(frame)
+            tracker_state = self.tracker.update(detections, w, h)
+        self._frame_idx += 1
         control = self.controller.update(tracker_state)
-        annotated = self.detector.draw_detections(frame, detections)
-        annotated = self._draw_feedback(annotated, tracker_state, control, w, h)
         state = {
             "detections": detections,
             "tracker_state": tracker_state,
             "control": control,
         }
-        return annotated, control, state
+        return control, state
+
+    def render(
+        self,
+        frame: np.ndarray,
+        state: dict[str, Any],
+        control: ControlSignal,
+    ) -> np.ndarray:
+        """Render path: draw detections and feedback overlay on frame (in place)."""
+        h, w = frame.shape[:2]
+        annotated = self.detector.draw_detections(frame, state["detections"])
+        return self._draw_feedback(annotated, state["tracker_state"], control, w, h)
+
+    def step_control_batch(
+        self,
+        frames: list[np.ndarray],
+    ) -> list[tuple[ControlSignal, dict[str, Any]]]:
+        """
+        step_control() over consecutive frames, running the detector once for every
+        frame that is due for detection. Tracker and controller still update in order.
+        """
+        if self._tracker_cv is None:
+            # Nothing to follow between detections (target lost, or no OpenCV tracker
+            # installed): every frame would detect, so put them all in the one pass.
+            due = list(range(len(frames)))
+        else:
+            due = [i for i in range(len(frames)) if self._detect_due(i)]
+        detections: dict[int, Detections] = {}
+        if due:
+            batched = self.detector.detect_batch([frames[i] for i in due], classes=self._classes_arr)
+            detections = dict(zip(due, batched))
+        return [self.step_control(frame, detections.get(i)) for i, frame in enumerate(frames)]
+
+    def _detect_due(self, offset: int) -> bool:
+        """Whether the frame `offset` frames from now needs a full detection."""
+        if offset == 0 and self._tracker_cv is None:
+            return True
+        return (self._frame_idx + offset) % self.detect_every == 0
+
+    def _start_cv_tracker(
+        self,
+        frame: np.ndarray,
+        detections: Detections,
+        index: int | None,
+    ) -> None:
+        """(Re)initialise the between-detections tracker on the chosen target."""
+        self._tracker_cv = None
+        if self.detect_every == 1 or index is None:
+            return
+        tracker = _create_cv_tracker()
+        if tracker is None:
+            return
+        self._tracked = detections.take(index)
+        x1, y1, x2, y2 = self._tracked.xyxy[0].tolist()
+        tracker.init(frame, (int(x1), int(y1), max(1, int(x2 - x1)), max(1, int(y2 - y1))))
+        self._tracker_cv = tracker
+
+    def _follow_cv_tracker(self, frame: np.ndarray) -> Detections:
+        """Target box from the OpenCV tracker; empty when it loses the target."""
+        ok, (x, y, bw, bh) = self._tracker_cv.update(frame)
+        if not ok:
+            self._tracker_cv = None
+            return Detections.empty(self._tracked.names)
+        t = self._tracked
+        # Fresh box per frame: states from earlier frames of a batch keep their own.
+        xyxy = np.array([[x, y, x + bw, y + bh]], dtype=np.float32)
+        return Detections(xyxy, t.conf, t.cls, t.names)
 
     def _draw_feedback(
         self,
         frame: np.ndarray,
-        tracker_state: dict[str, Any],
+        tracker_state: TrackerState,
         control: ControlSignal,
         width: int,
         height: int,
     ) -> np.ndarray:
-        """Overlay center band, target position, and control text."""
-        out = frame.copy()
-        cx = int(tracker_state.get("cx_norm", 0.5) * width)
-        cy = int(tracker_state.get("cy_norm", 0.5) * height)
-        margin = int(0.15 * width)
+        """Overlay center band, target position, and control text (in place)."""
+        out = frame
+        cx = int(tracker_state.cx_norm * width)
+        cy = int(tracker_state.cy_norm * height)
         # Center band (green = good)
-        cv2.rectangle(out, (width // 2 - margin, 0), (width // 2 + margin, height), (0, 200, 0), 1)
+        if self._overlay_size != (width, height):
+            self._build_overlay(width, height)
+        x0, x1 = self._overlay_cols
+        cv2.copyTo(self._overlay_template, self._overlay_mask, out[:, x0:x1])
         # Target point
-        color = (0, 255, 0) if tracker_state.get("found") else (0, 0, 255)
+        color = (0, 255, 0) if tracker_state.found else (0, 0, 255)
         cv2.circle(out, (cx, cy), 8, color, 2)
         # Control text
-        text = f"{control.mode} L:{control.linear:.2f} A:{control.angular:.2f}"
-        cv2.putText(out, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.putText(out, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 1)
+        sprite, keep, x0, y0 = self._text_sprite(control)
+        y1, x1 = min(height, y0 + sprite.shape[0]), min(width, x0 + sprite.shape[1])
+        if y1 > y0 and x1 > x0:
+            h, w = y1 - y0, x1 - x0
+            roi = out[y0:y1, x0:x1]
+            cv2.multiply(roi, keep[:h, :w], dst=roi, scale=1.0 / 255.0)
+            cv2.add(roi, sprite[:h, :w], dst=roi)
         return out
 
+    def _text_sprite(self, control: ControlSignal) -> tuple[np.ndarray, np.ndarray, int, int]:
+        """
+        Cached (sprite, keep, x, y) for the control text: white outline under
+        black text, rendered once per distinct value and stamped at (x, y) as
+        frame * keep / 255 + sprite (keep = how much frame shows through; this
+        also holds for antialiased text, which OpenCV 5 always draws).
+        """
+        key = (control.mode, round(control.linear, 2), round(control.angular, 2))
+        cached = self._text_cache.get(key)
+        if cached is not None:
+            self._text_cache.move_to_end(key)
+            return cached
+        text = f"{control.mode} L:{control.linear:.2f} A:{control.angular:.2f}"
+        font, scale, org = cv2.FONT_HERSHEY_SIMPLEX, 0.7, (10, 30)
+        (tw, th), baseline = cv2.getTextSize(text, font, scale, 2)
+        x0, y0 = max(0, org[0] - 2), max(0, org[1] - th - 2)
+        w, h = org[0] + tw + 2 - x0, org[1] + baseline + 2 - y0
+        at = (org[0] - x0, org[1] - y0)
+        # Same two passes as drawing on the frame: on black they leave the text's own
+        # colour contribution, on white the fraction of the frame left visible.
+        sprite = np.zeros((h, w, 3), dtype=np.uint8)
+        keep = np.full((h, w, 3), 255, dtype=np.uint8)
+        cv2.putText(sprite, text, at, font, scale, (255, 255, 255), 2)
+        cv2.putText(keep, text, at, font, scale, (0, 0, 0), 2)
+        cv2.putText(sprite, text, at, font, scale, (0, 0, 0), 1)
+        cv2.putText(keep, text, at, font, scale, (0, 0, 0), 1)
+        cached = (sprite, keep, x0, y0)
+        self._text_cache[key] = cached
+        if len(self._text_cache) > self._text_cache_size:
+            self._text_cache.popitem(last=False)
+        return cached
+
+    def _build_overlay(self, width: int, height: int) -> None:
+        """Render the center band once into a column-strip template + mask."""
+        margin = int(0.15 * width)
+        left, right = width // 2 - margin, width // 2 + margin
+        x0, x1 = max(0, left), min(width, right + 1)
+        template = np.zeros((height, x1 - x0, 3), dtype=np.uint8)
+        mask = np.zeros((height, x1 - x0), dtype=np.uint8)
+        cv2.rectangle(template, (left - x0, 0), (right - x0, height), (0, 200, 0), 1)
+        cv2.rectangle(mask, (left - x0, 0), (right - x0, height), 255, 1)
+        self._overlay_template = template
+        self._overlay_mask = mask
+        self._overlay_cols = (x0, x1)
+        self._overlay_size = (width, height)
+
     def run(
         self,
         source: int | str = 0,
         display: bool = True,
-        on_step: Callable[[np.ndarray, ControlSignal, dict], None] | None = None,
+        on_step: Callable[[ControlSignal, dict], None] | None = None,
     ) -> None:
         """
         Run loop from camera (source=0) or video file.
-        If display=True, show annotated window. on_step called each iteration.
+        If display=True, show annotated window. on_step(control, state) is called
+        for every frame from the compute thread, before any rendering.
+
+        Three stages overlap: a reader thread decodes frames, a compute thread runs
+        step_control() (detector, tracker and controller state live only there), and
+        the calling thread draws and shows the latest result (HighGUI windows must
+        stay on one thread, the main one on macOS). Rendering never holds up control:
+        if the display is busy, the older pending frame is dropped. None is the
+        shutdown sentinel. An exception in the compute stage stops the loop and is
+        re-raised here.
         """
         cap = cv2.VideoCapture(source)
         if not cap.isOpened():
             raise RuntimeError(f"Cannot open video source: {source}")
+        live = _is_live(source)
+        if live:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # keep the driver queue short; we want fresh frames
+        stop = threading.Event()
+        # Live frames are never batched: the reader keeps only the newest one pending, so
+        # control acts on a fresh frame instead of working through a backlog. Files keep
+        # every frame, with a queue deep enough that a whole batch can be waiting.
+        max_batch = 1 if live else self.detector.max_batch
+        read_q: queue.Queue[np.ndarray | None] = queue.Queue(maxsize=1 if live else max(2, max_batch))
+        render_q: queue.Queue[tuple | None] | None = queue.Queue(maxsize=1) if display else None
+        # Frame buffers are recycled through free_q, so decoding never reallocates.
+        # One per slot a frame can occupy: reader, read_q, compute batch, render_q, render.
+        free_q: queue.Queue[np.ndarray | None] = queue.Queue()
+        for _ in range(read_q.maxsize + max_batch + 3):
+            free_q.put(None)
+        errors: list[BaseException] = []
+
+        reader = threading.Thread(
+            target=self._read_frames, args=(cap, read_q, free_q, stop, live), daemon=True
+        )
+        worker = threading.Thread(
+            target=self._compute_frames,
+            args=(read_q, render_q, free_q, stop, max_batch, on_step, errors),
+            daemon=True,
+        )
+        reader.start()
+        worker.start()
         try:
-            while True:
-                ok, frame = cap.read()
-                if not ok:
-                    break
-                annotated, control, state = self.step(frame)
-                if on_step:
-                    on_step(annotated, control, state)
-                if display:
-                    cv2.imshow("Visual Feedback Loop", annotated)
-                    key = cv2.waitKey(1) & 0xFF
-                    if key == ord("q"):
-                        break
+            if display:
+                self._show_frames(render_q, free_q, stop)
+            worker.join()
         finally:
+            stop.set()
+            free_q.put(None)  # unblock a reader waiting for a buffer
+            _put(read_q, None, stop, force=True)  # unblock compute waiting for a frame
+            worker.join()
+            _drain(read_q)
+            reader.join()
             cap.release()
             if display:
                 cv2.destroyAllWindows()
+        if errors:
+            raise errors[0]
+
+    def _compute_frames(
+        self,
+        read_q: queue.Queue,
+        render_q: queue.Queue | None,
+        free_q: queue.Queue,
+        stop: threading.Event,
+        max_batch: int,
+        on_step: Callable[[ControlSignal, dict], None] | None,
+        errors: list[BaseException],
+    ) -> None:
+        """
+        Compute stage: step_control() on each frame (batched when several are waiting),
+        then offer the result to the display. Errors are recorded and stop the loop.
+        """
+        try:
+            done = False
+            while not done:
+                frame = read_q.get()
+                if frame is None or stop.is_set():
+                    break
+                # Dynamic batching: take whatever else is already waiting, up to
+                # max_batch. A single queued frame goes through step_control() unbatched.
+                frames = [frame]
+                while len(frames) < max_batch:
+                    try:
+                        frame = read_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if frame is None:
+                        done = True
+                        break
+                    frames.append(frame)
+                if len(frames) == 1:
+                    outputs = [self.step_control(frames[0])]
+                else:
+                    outputs = self.step_control_batch(frames)
+                for frame, (control, state) in zip(frames, outputs):
+                    if on_step:
+                        on_step(control, state)
+                    if render_q is not None:
+                        _offer_latest(render_q, (frame, state, control), free_q)
+                    else:
+                        free_q.put(frame)
+        except BaseException as exc:
+            errors.append(exc)
+            stop.set()
+        finally:
+            if render_q is not None:
+                _put(render_q, None, stop)  # let the display show the last frame, then exit
+
+    @staticmethod
+    def _read_frames(
+        cap: cv2.VideoCapture,
+        read_q: queue.Queue,
+        free_q: queue.Queue,
+        stop: threading.Event,
+        live: bool,
+    ) -> None:
+        """
+        Reader stage: decode frames into recycled buffers until EOF or stop.
+        Live sources replace the pending frame, so compute always takes the newest
+        one; files block instead, so no frame is lost.
+        """
+        try:
+            while not stop.is_set():
+                if not cap.grab():
+                    break
+                buf = free_q.get()
+                ok, frame = cap.retrieve(buf)
+                if not ok:
+                    break
+                if live:
+                    _offer_latest(read_q, frame, free_q)
+                elif not _put(read_q, frame, stop):
+                    break
+        finally:
+            _put(read_q, None, stop)
+
+    def _show_frames(
+        self,
+        render_q: queue.Queue,
+        free_q: queue.Queue,
+        stop: threading.Event,
+    ) -> None:
+        """
+        Display stage (calling thread): draw overlays and show the latest frame
+        until the compute stage finishes or stop is set; 'q' requests shutdown.
+        """
+        while not stop.is_set():
+            try:
+                item = render_q.get(timeout=0.05)
+            except queue.Empty:
+                item = ()  # nothing new; still pump the window events below
+            if item is None:
+                break
+            if item:
+                frame, state, control = item
+                cv2.imshow("Visual Feedback Loop", self.render(frame, state, control))
+                free_q.put(frame)
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord("q"):
+                stop.set()
+
+
+def _offer_latest(q: queue.Queue, item: Any, free_q: queue.Queue) -> None:
+    """
+    Non-blocking put that replaces a stale pending item, recycling its frame
+    (items are frames or (frame, ...) tuples).
+    """
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                stale = q.get_nowait()
+            except queue.Empty:
+                continue
+            if stale is not None:
+                free_q.put(stale[0] if isinstance(stale, tuple) else stale)
+
+
+def _is_live(source: int | str) -> bool:
+    """Camera index or network stream (frames may be dropped), as opposed to a file."""
+    if isinstance(source, int):
+        return True
+    return source.lower().startswith(("rtsp://", "rtmp://", "http://", "https://", "udp://"))
+
+
+def _create_cv_tracker() -> Any:
+    """
+    Lightweight OpenCV tracker: MOSSE, else KCF (both need opencv-contrib-python).
+    Returns None when neither is available; the loop then detects every frame.
+    """
+    legacy = getattr(cv2, "legacy", None)
+    for factory in (
+        getattr(legacy, "TrackerMOSSE_create", None),
+        getattr(legacy, "TrackerKCF_create", None),
+        getattr(cv2, "TrackerKCF_create", None),
+    ):
+        if factory is not None:
+            return factory()
+    return None
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event, force: bool = False) -> bool:
+    """
+    Blocking put that gives up once stop is set (returns False).
+    With force=True, make room by discarding queued items instead of giving up.
+    """
+    while True:
+        try:
+            q.put(item, timeout=0.05)
+            return True
+        except queue.Full:
+            if force:
+                _drain(q)
+            elif stop.is_set():
+                return False
+
+
+def _drain(q: queue.Queue) -> None:
+    """Discard everything currently queued."""
+    while True:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            return
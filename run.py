@@ -38,6 +38,32 @@ def main() -> int:
         default="yolov8n.pt",
         help="YOLOv8 model (e.g. yolov8n.pt, yolov8s.pt).",
     )
+    parser.add_argument(
+        "--precision",
+        type=str,
+        choices=["fp32", "fp16", "int8"],
+        default="fp16",
+        help="Inference precision; fp16/int8 export a TensorRT engine on CUDA (default fp16).",
+    )
+    parser.add_argument(
+        "--calib-data",
+        type=str,
+        default="coco8.yaml",
+        help="Dataset yaml used for INT8 calibration (default coco8.yaml).",
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=4,
+        help="Max queued frames detected in one forward pass when input outpaces "
+        "inference (default 4).",
+    )
+    parser.add_argument(
+        "--detect-every",
+        type=int,
+        default=3,
+        help="Run YOLO every N frames and track in between (1 = every frame; default 3).",
+    )
     parser.add_argument(
         "--center-margin",
         type=float,
@@ -48,10 +74,15 @@ def main() -> int:
 
     source = int(args.source) if args.source.isdigit() else args.source
 
-    detector = Detector(model_name=args.model)
+    detector = Detector(
+        model_name=args.model,
+        precision=args.precision,
+        calib_data=args.calib_data,
+        max_batch=args.max_batch,
+    )
     tracker = SimpleTracker()
     controller = Controller(center_margin=args.center_margin)
-    loop = FeedbackLoop(detector, tracker, controller)
+    loop = FeedbackLoop(detector, tracker, controller, detect_every=args.detect_every)
 
     loop.run(source=source, display=not args.no_display)
     return 0
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Model-free checks: target selection, letterbox geometry, overlay stamping."""
+import sys
+import warnings
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import cv2
+import numpy as np
+from control.controller import ControlSignal
+from loop.feedback_loop import FeedbackLoop
+from vision.detector import Detections, Detector
+from vision.tracker import SimpleTracker, TrackerState
+
+
+def _detections(boxes, confs):
+    return Detections(
+        xyxy=np.array(boxes, dtype=np.float32),
+        conf=np.array(confs, dtype=np.float32),
+        cls=np.zeros(len(confs), dtype=np.int32),
+        names=["obj"],
+    )
+
+
+def test_select_most_confident_without_history():
+    tracker = SimpleTracker()
+    dets = _detections([[0, 0, 10, 10], [50, 50, 60, 60], [80, 0, 90, 10]], [0.6, 0.9, 0.7])
+    state = tracker.update(dets, 100, 100)
+    assert state.found and state.index == 1
+    assert np.allclose((state.cx_norm, state.cy_norm), (0.55, 0.55))
+
+
+def test_select_closest_to_last_center():
+    tracker = SimpleTracker()
+    tracker.update(_detections([[10, 10, 20, 20]], [0.5]), 100, 100)
+    # The far box is more confident, but the near one continues the track.
+    dets = _detections([[80, 80, 90, 90], [12, 12, 22, 22]], [0.95, 0.4])
+    state = tracker.update(dets, 100, 100)
+    assert state.index == 1
+    assert np.array_equal(state.bbox_xyxy, dets.xyxy[1])
+
+
+def test_lost_target_keeps_last_center():
+    tracker = SimpleTracker()
+    tracker.update(_detections([[10, 10, 20, 20]], [0.5]), 100, 100)
+    state = tracker.update(Detections.empty(), 100, 100)
+    assert state.found and state.index is None and state.bbox_xyxy is None
+    assert np.allclose((state.cx_norm, state.cy_norm), (0.15, 0.15))
+
+
+def _letterbox_detector(imgsz=640):
+    det = Detector.__new__(Detector)  # geometry only: no model load
+    det.imgsz = imgsz
+    det._rgb = np.full((1, imgsz, imgsz, 3), 114, dtype=np.uint8)
+    det._gpu_preprocess = False
+    det._gpu_checked = False
+    det._frame_shape = None
+    return det
+
+
+def test_letterbox_round_trip():
+    det = _letterbox_detector()
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[:] = (255, 0, 0)  # BGR blue
+    det._preprocess(frame)
+    assert det.scale == 0.5 and det.pad == (0, 140)
+    rgb = det._rgb[0]
+    assert (rgb[:140] == 114).all() and (rgb[500:] == 114).all()
+    assert (rgb[140:500] == (0, 0, 255)).all()  # RGB blue
+    boxes = np.array([[100, 200, 300, 400], [0, 0, 1280, 720]], dtype=np.float32)
+    left, top = det.pad
+    model_px = boxes * det.scale + np.array([left, top, left, top], dtype=np.float32)
+    assert np.allclose(det._to_frame_coords(model_px), boxes)
+
+
+def test_gpu_preprocess_failure_falls_back_to_cpu():
+    det = _letterbox_detector()
+    det._gpu_preprocess = True
+
+    def broken(*args):
+        raise RuntimeError("no CV-CUDA kernel")
+
+    det._set_gpu_buffers = broken
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[:] = (255, 0, 0)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        det._preprocess(frame)
+    assert len(caught) == 1 and not det._gpu_preprocess
+    assert det.pad == (0, 140) and (det._rgb[0, 140:500] == (0, 0, 255)).all()
+
+
+def test_overlay_matches_direct_drawing():
+    width, height = 320, 240
+    loop = FeedbackLoop(None, SimpleTracker(), None)
+    state = TrackerState(found=True, cx_norm=0.25, cy_norm=0.5, bbox_xyxy=None)
+    control = ControlSignal(linear=0.0, angular=0.4, mode="rotate_left")
+    first = np.full((height, width, 3), 90, dtype=np.uint8)
+    loop._draw_feedback(first, state, control, width, height)
+    out = np.full((height, width, 3), 90, dtype=np.uint8)
+    loop._draw_feedback(out, state, control, width, height)  # from the cached sprites
+    assert np.array_equal(out, first)
+
+    ref = np.full((height, width, 3), 90, dtype=np.uint8)
+    margin = int(0.15 * width)
+    cv2.rectangle(ref, (width // 2 - margin, 0), (width // 2 + margin, height), (0, 200, 0), 1)
+    cv2.circle(ref, (80, 120), 8, (0, 255, 0), 2)
+    text = "rotate_left L:0.00 A:0.40"
+    cv2.putText(ref, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    cv2.putText(ref, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 1)
+    # Exact with aliased text; OpenCV 5 antialiases it, leaving rounding differences.
+    assert np.abs(out.astype(np.int16) - ref).max() <= 2
+
+
+def main():
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"OK: {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Per-frame bbox helpers. bbox_in_frame_normalized is JIT-compiled with Numba when
+it is installed; without Numba it runs as plain Python with identical results.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+# Numba optional; without it njit is a no-op decorator
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+def center_of_bbox(xyxy: np.ndarray) -> tuple[float, float]:
+    """Return (cx, cy) center of bbox [x1, y1, x2, y2]."""
+    x1, y1, x2, y2 = xyxy
+    return ((x1 + x2) / 2, (y1 + y2) / 2)
+
+
+@njit(fastmath=True, cache=True)
+def bbox_in_frame_normalized(
+    xyxy: np.ndarray,
+    width: int,
+    height: int,
+) -> tuple[float, float]:
+    """
+    Return (cx_norm, cy_norm) in [0, 1] for frame dimensions.
+    Useful for control: 0.5 = center.
+    """
+    # Center computed inline: a call into plain Python would leave nopython mode.
+    cx, cy = (xyxy[0] + xyxy[2]) / 2, (xyxy[1] + xyxy[3]) / 2
+    return (cx / width if width else 0.5, cy / height if height else 0.5)
+
+
+# Pay the compile cost at import, not on the first frame (detections are float32).
+bbox_in_frame_normalized(np.zeros(4, dtype=np.float32), 1, 1)
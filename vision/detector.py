@@ -5,16 +5,84 @@ Provides bounding boxes and class labels for feedback-loop decisions.
 
 from __future__ import annotations
 
-from typing import Any
+import contextlib
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
 
 import cv2
 import numpy as np
 
 try:
+    import torch
     from ultralytics import YOLO
 except ImportError:
+    torch = None
     YOLO = None
 
+# CV-CUDA optional (GPU preprocessing)
+try:
+    import cvcuda
+except ImportError:
+    cvcuda = None
+
+PRECISIONS = ("fp32", "fp16", "int8")
+
+
+def _configure_torch() -> None:
+    """Global PyTorch settings for fast fixed-size convolution inference."""
+    # Input size is fixed, so let cuDNN autotune conv kernels once.
+    torch.backends.cudnn.benchmark = True
+    # TF32 tensor cores for FP32 matmul/conv on Ampere+ (no effect elsewhere).
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+
+
+@dataclass
+class Detections:
+    """
+    Detections for one frame as parallel arrays (one row per box).
+    Consumers index the arrays directly; no per-box Python objects are built.
+    """
+
+    xyxy: np.ndarray           # (N, 4) float32, frame pixels
+    conf: np.ndarray           # (N,) float32
+    cls: np.ndarray            # (N,) int32
+    names: list[str]           # class id → class name (model-wide table)
+
+    @classmethod
+    def empty(cls, names: list[str] | None = None) -> Detections:
+        return cls(
+            xyxy=np.empty((0, 4), dtype=np.float32),
+            conf=np.empty((0,), dtype=np.float32),
+            cls=np.empty((0,), dtype=np.int32),
+            names=names if names is not None else [],
+        )
+
+    def __len__(self) -> int:
+        return len(self.cls)
+
+    def class_name(self, i: int) -> str:
+        cls_id = int(self.cls[i])
+        return self.names[cls_id] if cls_id < len(self.names) else str(cls_id)
+
+    def take(self, idx: int | np.ndarray) -> Detections:
+        """Copy of the selected rows (index array, bool mask, or a single int)."""
+        if isinstance(idx, (int, np.integer)):
+            idx = [idx]
+        return Detections(self.xyxy[idx], self.conf[idx], self.cls[idx], self.names)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Backwards-compatible view: yield {bbox_xyxy, class_id, class_name, conf} dicts."""
+        for i in range(len(self)):
+            yield {
+                "bbox_xyxy": self.xyxy[i],
+                "class_id": int(self.cls[i]),
+                "class_name": self.class_name(i),
+                "conf": float(self.conf[i]),
+            }
+
 
 class Detector:
     """YOLOv8 detector wrapper for real-time object detection."""
@@ -24,61 +92,292 @@ class Detector:
         model_name: str = "yolov8n.pt",
         conf_threshold: float = 0.5,
         iou_threshold: float = 0.45,
+        precision: str = "fp32",
+        calib_data: str = "coco8.yaml",
+        imgsz: int = 640,
+        max_batch: int = 1,
+        classes: list[int] | None = None,
     ) -> None:
         if YOLO is None:
             raise ImportError("Install ultralytics: pip install ultralytics")
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+        self.precision = precision
+        self.imgsz = imgsz
+        self.max_batch = max(1, max_batch)  # frames per forward pass in detect_batch
+        _configure_torch()
+        self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+        cuda = self.device.type == "cuda"
+        if precision != "fp32" and Path(model_name).suffix == ".pt" and cuda:
+            try:
+                model_name = self._export_engine(model_name, calib_data)
+            except Exception as exc:  # e.g. TensorRT not installed
+                warnings.warn(f"TensorRT export failed ({exc}); running PyTorch weights instead")
         self.model = YOLO(model_name)
+        # PyTorch weights run in channels_last (NHWC) so cuDNN picks tensor-core conv
+        # kernels. Fuse first: Ultralytics would otherwise fuse later and rebuild the
+        # weights in NCHW. TensorRT engines read raw NCHW input, so they keep it.
+        self._channels_last = Path(model_name).suffix == ".pt"
+        if self._channels_last:
+            self.model.fuse()
+            self.model.model.to(memory_format=torch.channels_last)
+        # Without an engine, still run FP16 weights on tensor-core GPUs (compute ≥ 7.0).
+        self._half = (
+            precision != "fp32"
+            and Path(model_name).suffix == ".pt"
+            and cuda
+            and torch.cuda.get_device_capability(self.device) >= (7, 0)
+        )
+        if self._half:
+            self.model.model.half()
+        self._autocast = (
+            torch.autocast("cuda", dtype=torch.float16) if self._half else contextlib.nullcontext()
+        )
+        # Class names as a list indexed by class id (no per-detection dict lookups).
+        names_dict = self.model.names
+        self.class_names = [names_dict.get(i, str(i)) for i in range(max(names_dict) + 1)]
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
+        # Default class filter, applied on host with np.isin; predict always gets
+        # classes=None so Ultralytics doesn't rebuild a filter tensor every call.
+        self._classes_arr = _as_class_array(classes)
+        # Fixed-size model input (max_batch, 3, imgsz, imgsz) in [0, 1], refilled in place.
+        # A tensor input makes Ultralytics skip its own letterbox/normalize step. Its dtype
+        # is what the model consumes, so Ultralytics never casts it again.
+        dtype = torch.float16 if self._half else torch.float32
+        memory_format = torch.channels_last if self._channels_last else torch.contiguous_format
+        self.inp = torch.empty(
+            (self.max_batch, 3, imgsz, imgsz),
+            device=self.device, dtype=dtype, memory_format=memory_format,
+        )
+        # Host staging images, one per batch slot; padding stays at 114. On CUDA they are
+        # pinned and copied as-is (uint8, NHWC) into a matching device tensor, so the
+        # upload is a plain async DMA; permute, cast and /255 then run on the GPU.
+        host = torch.full((self.max_batch, imgsz, imgsz, 3), 114, dtype=torch.uint8)
+        if cuda:
+            host = host.pin_memory()
+        self._host = host
+        self._rgb = host.numpy()
+        self._dev = torch.empty(host.shape, dtype=torch.uint8, device=self.device) if cuda else host
+        self._resized: np.ndarray | None = None
+        # With CV-CUDA, letterbox/colour run on the GPU straight into the device staging
+        # tensor. The first frame proves the path works; if it fails, fall back to the CPU.
+        self._gpu_preprocess = cvcuda is not None and self.device.type == "cuda"
+        self._gpu_checked = False
+        self._gpu: dict[str, Any] = {}
+        self._frame_shape: tuple[int, int] | None = None
+        self.scale = 1.0
+        self.pad = (0, 0)  # (left, top) in model-input pixels
+
+    def _export_engine(self, model_name: str, calib_data: str) -> str:
+        """
+        Export a .pt model to a TensorRT engine (FP16 or INT8) next to the weights.
+        The engine is reused on later runs; returns its path.
+        """
+        src = Path(model_name)
+        engine_path = src.with_name(
+            f"{src.stem}-{self.precision}-{self.imgsz}-b{self.max_batch}.engine"
+        )
+        if engine_path.exists():
+            return str(engine_path)
+        int8 = self.precision == "int8"
+        exported = YOLO(model_name).export(
+            format="engine",
+            half=not int8,
+            int8=int8,
+            data=calib_data if int8 else None,  # INT8 calibration images
+            imgsz=self.imgsz,
+            batch=self.max_batch,
+            dynamic=self.max_batch > 1,  # accept any batch size up to max_batch
+            workspace=4,
+            verbose=False,
+        )
+        Path(exported).replace(engine_path)
+        return str(engine_path)
+
+    def _set_geometry(self, height: int, width: int) -> None:
+        """Precompute letterbox scale/pad and the resize buffers for a frame size."""
+        r = min(self.imgsz / height, self.imgsz / width)
+        new_w, new_h = round(width * r), round(height * r)
+        left, top = (self.imgsz - new_w) // 2, (self.imgsz - new_h) // 2
+        self.scale = r
+        self.pad = (left, top)
+        if self._gpu_preprocess:
+            self._set_gpu_buffers(height, width, new_h, new_w)
+        else:
+            self._rgb[:] = 114
+            self._resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self._frame_shape = (height, width)
+
+    def _set_gpu_buffers(self, height: int, width: int, new_h: int, new_w: int) -> None:
+        """Device buffers (torch-owned, wrapped as CV-CUDA tensors) for one frame size."""
+        size = self.imgsz
+
+        def buf(shape: tuple[int, ...]) -> torch.Tensor:
+            return torch.empty(shape, dtype=torch.uint8, device=self.device)
+
+        frame = buf((1, height, width, 3))
+        resized, padded = buf((1, new_h, new_w, 3)), buf((1, size, size, 3))
+        self._gpu = {
+            "frame": frame,
+            "cv_frame": cvcuda.as_tensor(frame, "NHWC"),
+            "resized": cvcuda.as_tensor(resized, "NHWC"),
+            "padded": cvcuda.as_tensor(padded, "NHWC"),
+            "dev": [  # one view per staging slot; CV-CUDA only ever writes uint8
+                cvcuda.as_tensor(self._dev[i:i + 1], "NHWC") for i in range(self.max_batch)
+            ],
+            "keep": (resized, padded),  # torch owns the memory
+        }
+
+    def _preprocess_gpu(self, frame: np.ndarray, slot: int) -> None:
+        """GPU path: one upload of the raw BGR frame, then CV-CUDA kernels into self._dev[slot]."""
+        g = self._gpu
+        left, top = self.pad
+        stream = cvcuda.as_stream(torch.cuda.current_stream(self.device))
+        g["frame"][0].copy_(torch.from_numpy(frame))
+        cvcuda.resize_into(g["resized"], g["cv_frame"], cvcuda.Interp.LINEAR, stream=stream)
+        cvcuda.copymakeborder_into(
+            g["padded"], g["resized"],
+            border_mode=cvcuda.Border.CONSTANT, border_value=[114.0, 114.0, 114.0],
+            top=top, left=left, stream=stream,
+        )
+        cvcuda.cvtcolor_into(g["dev"][slot], g["padded"], cvcuda.ColorConversion.BGR2RGB, stream=stream)
+
+    def _preprocess(self, frame: np.ndarray, slot: int = 0) -> None:
+        """
+        Letterbox + BGR→RGB a BGR frame into staging slot `slot`: on the host,
+        or with CV-CUDA straight into the device staging tensor.
+        """
+        h, w = frame.shape[:2]
+        if self._gpu_preprocess:
+            try:
+                if self._frame_shape != (h, w):
+                    self._set_geometry(h, w)
+                self._preprocess_gpu(frame, slot)
+                self._gpu_checked = True
+                return
+            except Exception as exc:
+                if self._gpu_checked:
+                    raise
+                warnings.warn(f"CV-CUDA preprocessing failed ({exc}); using the CPU path")
+                self._gpu_preprocess = False
+                self._frame_shape = None
+        if self._frame_shape != (h, w):
+            self._set_geometry(h, w)
+        resized = self._resized
+        rgb = self._rgb[slot]
+        new_h, new_w = resized.shape[:2]
+        left, top = self.pad
+        cv2.resize(frame, (new_w, new_h), dst=resized, interpolation=cv2.INTER_LINEAR)
+        rgb[top:top + new_h, left:left + new_w] = resized
+        cv2.cvtColor(rgb, cv2.COLOR_BGR2RGB, dst=rgb)
+
+    def _load(self, frames: list[np.ndarray]) -> torch.Tensor:
+        """Preprocess frames into the first len(frames) slots of self.inp; returns that view."""
+        for slot, frame in enumerate(frames):
+            self._preprocess(frame, slot)
+        n = len(frames)
+        inp = self.inp[:n]
+        # Same dtype and layout on both sides: a single DMA of the uint8 bytes. The staging
+        # slots are free again by the next call, since predict() syncs on its results.
+        # CV-CUDA already wrote the device staging tensor.
+        if not self._gpu_preprocess and self._dev is not self._host:
+            self._dev[:n].copy_(self._host[:n], non_blocking=True)
+        inp.copy_(self._dev[:n].permute(0, 3, 1, 2))
+        inp.div_(255.0)
+        return inp
+
+    def _to_frame_coords(self, xyxy: np.ndarray) -> np.ndarray:
+        """Map xyxy boxes from model-input pixels back to original frame pixels (in place)."""
+        left, top = self.pad
+        h, w = self._frame_shape
+        xyxy[..., 0::2] -= left
+        xyxy[..., 1::2] -= top
+        xyxy /= self.scale
+        np.clip(xyxy[..., 0::2], 0, w, out=xyxy[..., 0::2])
+        np.clip(xyxy[..., 1::2], 0, h, out=xyxy[..., 1::2])
+        return xyxy
 
     def detect(
         self,
         frame: np.ndarray,
-        classes: list[int] | None = None,
-    ) -> list[dict[str, Any]]:
+        classes: list[int] | np.ndarray | None = None,
+    ) -> Detections:
         """
         Run detection on a BGR frame.
-        Returns list of detections: [{bbox_xyxy, class_id, class_name, conf}, ...].
+        Returns Detections (parallel xyxy / conf / cls arrays).
+        classes overrides the constructor's class filter (None = use it).
         """
-        results = self.model.predict(
-            frame,
-            conf=self.conf_threshold,
-            iou=self.iou_threshold,
-            classes=classes,
-            verbose=False,
-        )
-        out: list[dict[str, Any]] = []
+        keep = self._classes_arr if classes is None else _as_class_array(classes)
+        results = self._predict(self._load([frame]))
         if not results:
-            return out
-        r = results[0]
+            return Detections.empty(self.class_names)
+        return self._to_detections(results[0], keep)
+
+    def detect_batch(
+        self,
+        frames: list[np.ndarray],
+        classes: list[int] | np.ndarray | None = None,
+    ) -> list[Detections]:
+        """
+        Run detection on several BGR frames of the same size, up to max_batch per
+        forward pass. Returns one Detections per frame, in order.
+        """
+        if len({f.shape for f in frames}) > 1:
+            return [self.detect(f, classes=classes) for f in frames]
+        keep = self._classes_arr if classes is None else _as_class_array(classes)
+        out: list[Detections] = []
+        for start in range(0, len(frames), self.max_batch):
+            results = self._predict(self._load(frames[start:start + self.max_batch]))
+            out.extend(self._to_detections(r, keep) for r in results)
+        return out
+
+    def _predict(self, inp: torch.Tensor) -> list[Any]:
+        with self._autocast:
+            return self.model.predict(
+                inp,
+                imgsz=self.imgsz,
+                conf=self.conf_threshold,
+                iou=self.iou_threshold,
+                classes=None,
+                half=self._half,  # keeps Ultralytics from casting the weights back to FP32
+                verbose=False,
+            )
+
+    def _to_detections(self, r: Any, keep_classes: np.ndarray | None) -> Detections:
+        """Ultralytics Results → Detections in frame coordinates, filtered by class."""
         if r.boxes is None:
-            return out
+            return Detections.empty(self.class_names)
         boxes = r.boxes
-        for i in range(len(boxes)):
-            xyxy = boxes.xyxy[i].cpu().numpy()
-            conf = float(boxes.conf[i].cpu().numpy())
-            cls_id = int(boxes.cls[i].cpu().numpy())
-            cls_name = r.names.get(cls_id, str(cls_id))
-            out.append({
-                "bbox_xyxy": xyxy,
-                "class_id": cls_id,
-                "class_name": cls_name,
-                "conf": conf,
-            })
-        return out
+        # One device→host copy per field instead of three per box.
+        xyxy = boxes.xyxy.cpu().numpy().astype(np.float32, copy=False)
+        conf = boxes.conf.cpu().numpy().astype(np.float32, copy=False)
+        cls = boxes.cls.cpu().numpy().astype(np.int32)
+        if keep_classes is not None:
+            mask = np.isin(cls, keep_classes)
+            if not mask.all():
+                xyxy, conf, cls = xyxy[mask], conf[mask], cls[mask]
+        return Detections(
+            xyxy=self._to_frame_coords(xyxy),
+            conf=conf,
+            cls=cls,
+            names=self.class_names,
+        )
 
     def draw_detections(
         self,
         frame: np.ndarray,
-        detections: list[dict[str, Any]],
+        detections: Detections,
         color: tuple[int, int, int] = (0, 255, 0),
         thickness: int = 2,
+        inplace: bool = True,
     ) -> np.ndarray:
-        """Draw bounding boxes and labels on frame (in-place style; returns frame)."""
-        out = frame.copy()
-        for d in detections:
-            x1, y1, x2, y2 = d["bbox_xyxy"].astype(int)
-            label = f"{d['class_name']} {d['conf']:.2f}"
+        """Draw bounding boxes and labels on frame (in place unless inplace=False; returns it)."""
+        out = frame if inplace else frame.copy()
+        boxes = detections.xyxy.astype(np.int32)
+        for i in range(len(detections)):
+            x1, y1, x2, y2 = boxes[i].tolist()
+            label = f"{detections.class_name(i)} {detections.conf[i]:.2f}"
             cv2.rectangle(out, (x1, y1), (x2, y2), color, thickness)
             (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
             cv2.rectangle(out, (x1, y1 - th - 4), (x1 + tw, y1), color, -1)
@@ -87,3 +386,10 @@ class Detector:
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1,
             )
         return out
+
+
+def _as_class_array(classes: list[int] | np.ndarray | None) -> np.ndarray | None:
+    """Class filter as an int64 array; None or empty means no filtering."""
+    if classes is None or len(classes) == 0:
+        return None
+    return np.asarray(classes, dtype=np.int64)
@@ -5,11 +5,17 @@ Used for tracking a region or pose when needed by the feedback loop.
 
 from __future__ import annotations
 
-from typing import Any
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 import cv2
 import numpy as np
 
+from vision._fast import bbox_in_frame_normalized, center_of_bbox  # noqa: F401 (re-export)
+
+if TYPE_CHECKING:
+    from vision.detector import Detections
+
 # MediaPipe optional
 try:
     import mediapipe as mp
@@ -17,23 +23,15 @@ except ImportError:
     mp = None
 
 
-def center_of_bbox(xyxy: np.ndarray) -> tuple[float, float]:
-    """Return (cx, cy) center of bbox [x1, y1, x2, y2]."""
-    x1, y1, x2, y2 = xyxy
-    return ((x1 + x2) / 2, (y1 + y2) / 2)
+@dataclass(slots=True)
+class TrackerState:
+    """Target state from SimpleTracker.update (attribute access, no dict lookups)."""
 
-
-def bbox_in_frame_normalized(
-    xyxy: np.ndarray,
-    width: int,
-    height: int,
-) -> tuple[float, float]:
-    """
-    Return (cx_norm, cy_norm) in [0, 1] for frame dimensions.
-    Useful for control: 0.5 = center.
-    """
-    cx, cy = center_of_bbox(xyxy)
-    return (cx / width if width else 0.5, cy / height if height else 0.5)
+    found: bool
+    cx_norm: float                # in [0, 1]; 0.5 = center
+    cy_norm: float                # in [0, 1]
+    bbox_xyxy: np.ndarray | None  # target box in frame pixels, None if not detected
+    index: int | None = None      # row of the target in detections, None if not detected
 
 
 class PoseTracker:
@@ -79,37 +77,46 @@ class SimpleTracker:
 
     def update(
         self,
-        detections: list[dict[str, Any]],
+        detections: Detections,
         frame_width: int,
         frame_height: int,
-    ) -> dict[str, Any]:
+    ) -> TrackerState:
         """
-        Update state from current detections. Prefer first detection as 'target'.
-        Returns {
-            "found": bool,
-            "cx_norm": float in [0,1],
-            "cy_norm": float in [0,1],
-            "bbox_xyxy": optional,
-        }.
+        Update state from current detections. The target is the detection closest
+        to the previous center, or the most confident one when there is none.
+        Returns TrackerState(found, cx_norm, cy_norm, bbox_xyxy, index).
         """
         if not detections:
             self.lost_frames += 1
             if self.lost_frames >= self.lost_threshold:
                 self.last_center = None
-            return {
-                "found": self.lost_frames < self.lost_threshold and self.last_center is not None,
-                "cx_norm": 0.5 if self.last_center is None else self.last_center[0],
-                "cy_norm": 0.5 if self.last_center is None else self.last_center[1],
-                "bbox_xyxy": None,
-            }
-        d = detections[0]
-        xyxy = d["bbox_xyxy"]
+            return TrackerState(
+                found=self.lost_frames < self.lost_threshold and self.last_center is not None,
+                cx_norm=0.5 if self.last_center is None else self.last_center[0],
+                cy_norm=0.5 if self.last_center is None else self.last_center[1],
+                bbox_xyxy=None,
+            )
+        index = self._select(detections, frame_width, frame_height)
+        xyxy = detections.xyxy[index]
         cx_norm, cy_norm = bbox_in_frame_normalized(xyxy, frame_width, frame_height)
         self.last_center = (cx_norm, cy_norm)
         self.lost_frames = 0
-        return {
-            "found": True,
-            "cx_norm": cx_norm,
-            "cy_norm": cy_norm,
-            "bbox_xyxy": xyxy,
-        }
+        return TrackerState(
+            found=True,
+            cx_norm=cx_norm,
+            cy_norm=cy_norm,
+            bbox_xyxy=xyxy,
+            index=index,
+        )
+
+    def _select(self, detections: Detections, frame_width: int, frame_height: int) -> int:
+        """Row of the target among detections (vectorized, no per-box Python loop)."""
+        if len(detections) == 1:
+            return 0
+        if self.last_center is None:
+            return int(detections.conf.argmax())
+        xyxy = detections.xyxy
+        centers = (xyxy[:, 0:2] + xyxy[:, 2:4]) * 0.5
+        centers /= (frame_width or 1, frame_height or 1)
+        d2 = ((centers - self.last_center) ** 2).sum(axis=1)
+        return int(d2.argmin())